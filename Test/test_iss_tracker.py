@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 
 from unittest.mock import patch
+import io
+import time
 import math
+import numpy as np
+import orjson
 from datetime import datetime
 import pytest
-from iss_tracker import calculate_lat, calculate_alt, calculate_long, calculate_geoposition, get_data
+from iss_tracker import calculate_lat, calculate_alt, calculate_long, calculate_geoposition, get_data, parse_oem
 from iss_tracker import app
+import iss_tracker
 
 @pytest.fixture
 def client():
@@ -97,6 +102,9 @@ mock_data = [
     },
 ]
 
+# Cached document wrapping mock_data, as returned by get_document()
+mock_document = {'data': mock_data, 'version': '0123456789abcdef'}
+
 @patch('iss_tracker.get_data')
 def test_calculate_lat(mock_get_data):
     mock_get_data.return_value = mock_data
@@ -127,3 +135,233 @@ def test_calculate_geoposition(mock_calculate_long, mock_calculate_lat):
     mock_calculate_long.return_value = long
     expected_geoposition = "Sanpete County, Utah, United States"
     assert calculate_geoposition(lat, long) == expected_geoposition
+
+# Trimmed copy of the NASA OEM file for testing the parser without the network
+mock_xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ndm>
+  <oem id="CCSDS_OEM_VERS" version="2.0">
+    <header>
+      <CREATION_DATE>2024-075T20:59:30.931Z</CREATION_DATE>
+      <ORIGINATOR>JSC</ORIGINATOR>
+    </header>
+    <body>
+      <segment>
+        <metadata>
+          <OBJECT_NAME>ISS</OBJECT_NAME>
+          <OBJECT_ID>1998-067-A</OBJECT_ID>
+          <CENTER_NAME>EARTH</CENTER_NAME>
+          <REF_FRAME>EME2000</REF_FRAME>
+          <TIME_SYSTEM>UTC</TIME_SYSTEM>
+          <START_TIME>2024-079T00:56:00.000Z</START_TIME>
+          <STOP_TIME>2024-090T11:46:00.000Z</STOP_TIME>
+        </metadata>
+        <data>
+          <COMMENT>Units are in kg and m^2</COMMENT>
+          <COMMENT/>
+          <COMMENT>End sequence of events</COMMENT>
+          <stateVector>
+            <EPOCH>2024-079T00:56:00.000Z</EPOCH>
+            <X units="km">719.875689675049</X>
+            <Y units="km">5211.35844946617</Y>
+            <Z units="km">4294.87217744873</Z>
+            <X_DOT units="km/s">-6.46958114906447</X_DOT>
+            <Y_DOT units="km/s">-2.04604360061346</Y_DOT>
+            <Z_DOT units="km/s">3.56256406910499</Z_DOT>
+          </stateVector>
+          <stateVector>
+            <EPOCH>2024-090T11:42:00.000Z</EPOCH>
+            <X units="km">-4899.50219797882</X>
+            <Y units="km">-2160.01389417642</Y>
+            <Z units="km">-4196.10576548605</Z>
+            <X_DOT units="km/s">5.0874841659975</X_DOT>
+            <Y_DOT units="km/s">-4.35504009792081</Y_DOT>
+            <Z_DOT units="km/s">-3.69836419534284</Z_DOT>
+          </stateVector>
+        </data>
+      </segment>
+    </body>
+  </oem>
+</ndm>
+"""
+
+class MockResponse:
+    def __init__(self, content=mock_xml, status_code=200, headers=None):
+        self.content = content
+        self.raw = io.BytesIO(content)
+        self.status_code = status_code
+        self.headers = headers or {'ETag': '"abc"'}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+@patch('iss_tracker.session.get')
+def test_get_data_is_cached(mock_get):
+    iss_tracker._CACHE.clear()
+    mock_get.return_value = MockResponse()
+    first = get_data('http://example.com/iss.xml')
+    second = get_data('http://example.com/iss.xml')
+    assert mock_get.call_count == 1
+    assert second is first
+    assert first[0] == mock_data[0]
+
+def test_parse_oem():
+    document = parse_oem(io.BytesIO(mock_xml))
+    assert document['data'] == mock_data[:2]
+    assert document['header'] == {'CREATION_DATE': '2024-075T20:59:30.931Z', 'ORIGINATOR': 'JSC'}
+    assert document['metadata']['OBJECT_NAME'] == 'ISS'
+    assert document['comment'] == ['Units are in kg and m^2', None, 'End sequence of events']
+
+@patch('iss_tracker.session.get')
+def test_header_metadata_comment_share_download(mock_get, client):
+    iss_tracker._CACHE.clear()
+    mock_get.return_value = MockResponse()
+    assert client.get('/header').get_json()['ORIGINATOR'] == 'JSC'
+    assert client.get('/metadata').get_json()['OBJECT_ID'] == '1998-067-A'
+    assert client.get('/comment').get_json()[0] == 'Units are in kg and m^2'
+    assert mock_get.call_count == 1
+
+@patch('iss_tracker.session.get')
+def test_get_data_not_modified(mock_get):
+    iss_tracker._CACHE.clear()
+    mock_get.return_value = MockResponse()
+    first = get_data('http://example.com/iss.xml')
+    iss_tracker._CACHE['http://example.com/iss.xml']['ts'] -= iss_tracker.CACHE_TTL
+    mock_get.return_value = MockResponse(content=b'', status_code=304)
+    assert get_data('http://example.com/iss.xml') is first
+    assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"abc"'}
+    assert mock_get.return_value.closed
+
+@patch('iss_tracker.get_document')
+def test_state_vectors_lookup(mock_get_document, client):
+    mock_get_document.return_value = mock_document
+    response = client.get('/epochs/2024-090T11:46:00.000Z')
+    assert response.status_code == 200
+    assert response.get_json() == mock_data[2]
+    assert client.get('/epochs/2024-090T11:47:00.000Z').status_code == 404
+    response = client.get('/epochs/2024-090T11:46:00Z')
+    assert response.status_code == 200
+    assert response.get_json()['EPOCH'] == '2024-090T11:46:00.000Z'
+
+@patch('iss_tracker.get_document')
+def test_speed_lookup(mock_get_document, client):
+    mock_get_document.return_value = mock_document
+    response = client.get('/epochs/2024-079T00:56:00.000Z/speed')
+    assert response.status_code == 200
+    assert math.isclose(float(response.get_json()), 7.663787406134094, rel_tol=1e-9)
+
+@patch('iss_tracker.start_now_refresher')
+@patch('iss_tracker.calculate_geoposition')
+@patch('iss_tracker.get_document')
+def test_nearest_epoch_lookup(mock_get_document, mock_calculate_geoposition, mock_start_now_refresher, client):
+    iss_tracker._NOW = {}
+    mock_get_document.return_value = mock_document
+    mock_calculate_geoposition.return_value = "Location currently unavailable"
+    response = client.get('/now')
+    assert response.status_code == 200
+    assert response.get_json()['EPOCH'] == mock_data[-1]['EPOCH']
+    assert math.isclose(response.get_json()['Latitude'], calculate_lat(mock_data[-1]['EPOCH']))
+
+@patch('iss_tracker.geocoder.reverse')
+def test_calculate_geoposition_cached(mock_reverse):
+    iss_tracker.reverse_geocode.cache_clear()
+    mock_reverse.return_value.address = "Sanpete County, Utah, United States"
+    assert calculate_geoposition(39.2276, -111.8648) == "Sanpete County, Utah, United States"
+    assert calculate_geoposition(39.2281, -111.8641) == "Sanpete County, Utah, United States"
+    assert mock_reverse.call_count == 1
+    mock_reverse.assert_called_with("39.23,-111.86", zoom=15, language='en')
+
+def test_compute_derived_matches_numpy():
+    state = iss_tracker.build_state(mock_data)['state']
+    hour_frac = np.array([-11.0667, -0.3, -0.2333, -0.1667])
+    for expected, actual in zip(iss_tracker._compute_derived_numpy(state, hour_frac),
+                                iss_tracker.compute_derived(state, hour_frac)):
+        assert np.allclose(expected, actual)
+
+@patch('iss_tracker.get_document')
+def test_etag_not_modified(mock_get_document, client):
+    mock_get_document.return_value = mock_document
+    response = client.get('/epochs/2024-090T11:46:00.000Z')
+    assert response.headers['ETag'] == '"0123456789abcdef"'
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+    response = client.get('/epochs/2024-090T11:46:00.000Z', headers={'If-None-Match': '"0123456789abcdef"'})
+    assert response.status_code == 304
+    assert response.data == b''
+
+@patch('iss_tracker.calculate_geoposition')
+@patch('iss_tracker.get_document')
+def test_location_lookup(mock_get_document, mock_calculate_geoposition, client):
+    mock_get_document.return_value = mock_document
+    mock_calculate_geoposition.return_value = "Sanpete County, Utah, United States"
+    response = client.get('/epochs/2024-079T00:56:00.000Z/location')
+    assert response.status_code == 200
+    assert math.isclose(response.get_json()['Latitude'], 39.227672510032775, rel_tol=1e-9)
+    assert math.isclose(response.get_json()['Longitude'], -111.86483176776528, rel_tol=1e-9)
+    mock_calculate_geoposition.assert_called_once()
+    assert client.get('/epochs/2024-079T00:57:00.000Z/location').status_code == 404
+
+@patch('iss_tracker.start_now_refresher')
+@patch('iss_tracker.refresh_now')
+def test_nearest_epoch_serves_latest_result(mock_refresh_now, mock_start_now_refresher, client):
+    iss_tracker._NOW = {'result': {'EPOCH': '2024-090T11:50:00.000Z'}, 'etag': 'abc-3', 'ts': time.time()}
+    response = client.get('/now')
+    assert response.get_json() == {'EPOCH': '2024-090T11:50:00.000Z'}
+    mock_refresh_now.assert_not_called()
+    mock_start_now_refresher.assert_called_once()
+
+@patch('iss_tracker.session.get')
+def test_get_data_serves_cache_when_refresh_fails(mock_get):
+    iss_tracker._CACHE.clear()
+    mock_get.return_value = MockResponse()
+    first = get_data('http://example.com/iss.xml')
+    iss_tracker._CACHE['http://example.com/iss.xml']['ts'] -= iss_tracker.CACHE_TTL
+    mock_get.side_effect = Exception("NASA down")
+    assert get_data('http://example.com/iss.xml') is first
+    assert get_data('http://example.com/iss.xml') is first
+    assert mock_get.call_count == 2
+
+@patch('iss_tracker.get_document')
+def test_response_keys_sorted(mock_get_document, client):
+    mock_get_document.return_value = mock_document
+    response = client.get('/epochs/2024-090T11:46:00.000Z')
+    assert response.data.startswith(b'{"EPOCH":"2024-090T11:46:00.000Z","X":')
+    assert list(orjson.loads(response.data)) == sorted(mock_data[2])
+
+@patch('iss_tracker.calculate_geoposition')
+@patch('iss_tracker.get_document')
+def test_etag_checked_after_missing_epoch(mock_get_document, mock_calculate_geoposition, client):
+    mock_get_document.return_value = mock_document
+    mock_calculate_geoposition.return_value = "Location currently unavailable"
+    headers = {'If-None-Match': '"0123456789abcdef"'}
+    assert client.get('/epochs/nonsense', headers=headers).status_code == 404
+    assert client.get('/epochs/nonsense/speed', headers=headers).status_code == 404
+    assert client.get('/epochs/nonsense/location', headers=headers).status_code == 404
+    response = client.get('/epochs/2024-079T00:56:00.000Z/location')
+    assert response.headers['ETag'] == 'W/"0123456789abcdef"'
+    response = client.get('/epochs/2024-079T00:56:00.000Z/location', headers={'If-None-Match': 'W/"0123456789abcdef"'})
+    assert response.status_code == 304
+
+@patch('iss_tracker.start_now_refresher')
+@patch('iss_tracker.get_document')
+def test_nearest_epoch_serves_stale_result_when_refresh_fails(mock_get_document, mock_start_now_refresher, client):
+    mock_get_document.side_effect = Exception("NASA down")
+    iss_tracker._NOW = {'result': {'EPOCH': '2024-090T11:50:00.000Z'}, 'etag': 'abc-3-1', 'ts': time.time() - 61}
+    response = client.get('/now')
+    assert response.status_code == 200
+    assert response.get_json() == {'EPOCH': '2024-090T11:50:00.000Z'}
+    # The background refresh fails, logs, and releases the lock for the next attempt
+    assert iss_tracker._refresh_lock.acquire(timeout=5)
+    iss_tracker._refresh_lock.release()
+
+@patch('iss_tracker.get_data')
+def test_calculate_returns_python_float(mock_get_data):
+    mock_get_data.return_value = mock_data
+    epoch = "2024-079T00:56:00.000Z"
+    for value in (calculate_lat(epoch), calculate_alt(epoch), calculate_long(epoch)):
+        assert type(value) is float
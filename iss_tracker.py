@@ -1,21 +1,123 @@
 # !/usr/bin/env python3
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 import math
 import logging
+import functools
+import hashlib
+import time
+import threading
 import requests
-import xmltodict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
+import orjson
+from lxml import etree
 from datetime import datetime
 from typing import Union, Dict, Tuple, List
 from geopy.geocoders import Nominatim
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional; compute_derived() falls back to plain NumPy without it
+    njit = None
+
 
 app = Flask(__name__)
 
 
 url = 'https://nasa-public-data.s3.amazonaws.com/iss-coords/current/ISS_OEM/ISS.OEM_J2K_EPH.xml'
 
+# Seconds a parsed copy of the trajectory data is served before re-checking NASA
+CACHE_TTL = 60.0
+
+# Seconds clients may reuse a response before revalidating it with its ETag
+CLIENT_MAX_AGE = 60
+
+# Seconds to wait on NASA before giving up on a request
+REQUEST_TIMEOUT = 10
+
+# One pooled keep-alive session so NASA requests reuse their TCP/TLS connection
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.3)))
+
+# Parsed trajectory documents keyed by URL, as returned by get_document()
+_CACHE: Dict[str, Dict] = {}
+
+MEAN_EARTH_RADIUS = 6371.0088
+
+# Decimal places coordinates are rounded to before reverse geocoding (~1 km)
+GEOCODE_PRECISION = 2
+
+geocoder = Nominatim(user_agent='iss_tracker')
+
+# Column order of the (N, 6) state array built by build_state()
+STATE_KEYS = ('X', 'Y', 'Z', 'X_DOT', 'Y_DOT', 'Z_DOT')
+
+# Array copy of the most recent get_data() result, rebuilt whenever that list changes
+_STATE: Dict[str, object] = {'source': None}
+
+# Seconds between background refreshes of the /now result
+NOW_REFRESH_INTERVAL = 30
 
+# Latest /now result from refresh_now(): {'result': dict, 'etag': str, 'ts': float}
+_NOW: Dict[str, object] = {}
+_now_lock = threading.Lock()
+_now_thread = None
+
+# Held while refresh_now() runs, so only one refresh calls NASA and Nominatim at a time
+_refresh_lock = threading.Lock()
+
+
+def get_document(url: str) -> Dict[str, object]:
+    """
+    Fetches the XML document at a given URL and parses it with parse_oem().
+
+    The parsed document is cached per URL for CACHE_TTL seconds. Once it expires, a conditional
+    request is sent with the last ETag so an unchanged file is not downloaded or parsed again.
+    If that request fails, the cached copy keeps being served for another CACHE_TTL seconds.
+
+    Parameters:
+        url (str): The URL from which to fetch the XML data.
+
+    Returns:
+        dict: The sections returned by parse_oem(), plus the 'ts' and 'etag' of the download and
+              a 'version' hash of the document's CREATION_DATE used as the ETag of API responses.
+    """
+
+    entry = _CACHE.get(url)
+    now = time.monotonic()
+    if entry is not None and now - entry['ts'] < CACHE_TTL:
+        return entry
+
+    headers = {}
+    if entry is not None and entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+
+    try:
+        # Closing the streamed response returns its connection to the session's pool
+        with session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            if entry is not None and response.status_code == 304:
+                entry['ts'] = now
+                return entry
+            response.raise_for_status()
+            response.raw.decode_content = True
+            new_entry = dict(parse_oem(response.raw), ts=now, etag=response.headers.get('ETag'))
+    except Exception as e:
+        if entry is None:
+            raise
+        # Keep serving the last good copy and wait a full TTL before trying NASA again
+        logging.error(f"Error refreshing ISS data, serving cached copy: {e}")
+        entry['ts'] = now
+        return entry
+
+    entry = new_entry
+    creation_date = entry['header'].get('CREATION_DATE') or str(now)
+    entry['version'] = hashlib.blake2b(creation_date.encode(), digest_size=8).hexdigest()
+
+    _CACHE[url] = entry
+    return entry
 
 
 def get_data(url: str) -> List[Dict[str, float]]:
@@ -29,28 +131,228 @@ def get_data(url: str) -> List[Dict[str, float]]:
         list: A list of dictionaries containing ISS state vector data.
               Each dictionary represents a state vector with keys 'EPOCH', 'X', 'Y', 'Z', 'X_DOT', 'Y_DOT', and 'Z_DOT'.
     """
+    return get_document(url)['data']
 
-    response = requests.get(url)
-    response.raise_for_status()
-    data = xmltodict.parse(response.content)
-    
+
+def _compute_derived_numpy(state: np.ndarray, hour_frac: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    NumPy implementation of compute_derived().
+    """
+    x, y, z = state[:, 0], state[:, 1], state[:, 2]
+    r2 = x*x + y*y
+    lat = np.degrees(np.arctan2(z, np.sqrt(r2)))
+    alt = np.sqrt(r2 + z*z) - MEAN_EARTH_RADIUS
+    long = np.degrees(np.arctan2(y, x)) - hour_frac*(360/24)
+    long = ((long + 180.0) % 360.0) - 180.0
+
+    speed = np.sqrt((state[:, 3:6]**2).sum(-1))
+
+    return lat, long, alt, speed
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _compute_derived_numba(state, hour_frac):
+        """
+        Numba implementation of compute_derived(), one parallel loop over the epochs.
+        """
+        n = state.shape[0]
+        lat = np.empty(n)
+        long = np.empty(n)
+        alt = np.empty(n)
+        speed = np.empty(n)
+        for i in prange(n):
+            x, y, z = state[i, 0], state[i, 1], state[i, 2]
+            r2 = x*x + y*y
+            lat[i] = math.degrees(math.atan2(z, math.sqrt(r2)))
+            alt[i] = math.sqrt(r2 + z*z) - MEAN_EARTH_RADIUS
+
+            longitude = math.degrees(math.atan2(y, x)) - hour_frac[i]*(360/24)
+            long[i] = ((longitude + 180.0) % 360.0) - 180.0
+
+            x_dot, y_dot, z_dot = state[i, 3], state[i, 4], state[i, 5]
+            speed[i] = math.sqrt(x_dot*x_dot + y_dot*y_dot + z_dot*z_dot)
+
+        return lat, long, alt, speed
+
+
+def compute_derived(state: np.ndarray, hour_frac: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Calculates the latitude, longitude, altitude and speed of every row of a state array.
+
+    Uses a compiled Numba kernel when numba is installed and plain NumPy otherwise.
+
+    Parameters:
+        state (np.ndarray): An (N, 6) array with columns in STATE_KEYS order.
+        hour_frac (np.ndarray): Hours from noon of each epoch, used for the Earth rotation term.
+
+    Returns:
+        tuple: The (N,) latitude, longitude, altitude and speed arrays.
+    """
+    if njit is not None:
+        return _compute_derived_numba(state, hour_frac)
+    return _compute_derived_numpy(state, hour_frac)
+
+
+def build_state(data: List[Dict[str, float]]) -> Dict[str, np.ndarray]:
+    """
+    Converts a list of state vector dictionaries into column-oriented NumPy arrays.
+
+    Parameters:
+        data (list): State vector dictionaries as returned by get_data().
+
+    Returns:
+        dict: 'epochs' is an (N,) array of epoch strings sorted in time order,
+              'epochs_dt64' holds the same epochs as datetime64[ms] values,
+              'index' maps each epoch string to its row,
+              'state' is an (N, 6) float64 array with columns in STATE_KEYS order, and
+              'lat', 'long' and 'alt' hold the latitude, longitude and altitude of every epoch,
+              and 'speed' holds the magnitude of every velocity vector.
+    """
+    epochs = np.array([state_vector['EPOCH'] for state_vector in data], dtype='U24')
+    state = np.empty((len(data), len(STATE_KEYS)), dtype=np.float64)
+    for column, key in enumerate(STATE_KEYS):
+        state[:, column] = [state_vector[key] for state_vector in data]
+
+    # Epoch strings are fixed width, so lexical order is time order
+    if np.any(epochs[1:] < epochs[:-1]):
+        order = np.argsort(epochs, kind='stable')
+        epochs = epochs[order]
+        state = state[order]
+
+    # Epochs are fixed-format 'YYYY-DDDTHH:MM:SS.fffZ', so slice the fields instead of using strptime
+    epoch_list = epochs.tolist()
+    years = np.array([epoch[0:4] for epoch in epoch_list], dtype='datetime64[Y]')
+    days = np.array([int(epoch[5:8]) - 1 for epoch in epoch_list], dtype='timedelta64[D]')
+    hrs = np.array([int(epoch[9:11]) for epoch in epoch_list])
+    mins = np.array([int(epoch[12:14]) for epoch in epoch_list])
+    millis = np.array([round(float(epoch[15:].rstrip('Z')) * 1000) for epoch in epoch_list])
+
+    epochs_dt64 = (years.astype('datetime64[D]') + days + hrs.astype('timedelta64[h]')
+                   + mins.astype('timedelta64[m]') + millis.astype('timedelta64[ms]'))
+
+    lat, long, alt, speed = compute_derived(state, (hrs-12)+(mins/60))
+
+    return {
+        'epochs': epochs,
+        'epochs_dt64': epochs_dt64,
+        'index': {epoch: i for i, epoch in enumerate(epoch_list)},
+        'state': state,
+        'lat': lat,
+        'long': long,
+        'alt': alt,
+        'speed': speed
+    }
+
+
+def get_state(url: str) -> Dict[str, np.ndarray]:
+    """
+    Returns the array form of get_data(url), only rebuilding it when the underlying data changes.
+
+    Parameters:
+        url (str): The URL from which to fetch the XML data.
+
+    Returns:
+        dict: The arrays produced by build_state().
+    """
+    global _STATE
+
+    data = get_data(url)
+    if _STATE['source'] is not data:
+        _STATE = dict(build_state(data), source=data)
+    return _STATE
+
+
+def find_epoch(state: Dict[str, np.ndarray], epoch: str) -> Union[int, None]:
+    """
+    Finds the row of an epoch in the arrays produced by build_state().
+
+    Exact epoch strings are found through the index. Other spellings of the same instant
+    (e.g. '2024-090T11:46:00Z') fall back to a binary search of the sorted epochs_dt64 array.
+
+    Parameters:
+        state (dict): The arrays produced by build_state().
+        epoch (str): The epoch to look up.
+
+    Returns:
+        Union[int, None]: The row index, or None if the epoch is not in the data.
+    """
+    i = state['index'].get(epoch)
+    if i is not None:
+        return i
+
+    for fmt in ('%Y-%jT%H:%M:%S.%fZ', '%Y-%jT%H:%M:%SZ'):
+        try:
+            key = np.datetime64(datetime.strptime(epoch, fmt), 'ms')
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+
+    epochs_dt64 = state['epochs_dt64']
+    i = int(np.searchsorted(epochs_dt64, key))
+    if i < len(epochs_dt64) and epochs_dt64[i] == key:
+        return i
+    return None
+
+
+def state_vector_at(state: Dict[str, np.ndarray], i: int) -> Dict[str, Union[str, float]]:
+    """
+    Rebuilds the dictionary form of the state vector stored in row i.
+    """
+    state_vector = {'EPOCH': str(state['epochs'][i])}
+    state_vector.update(zip(STATE_KEYS, state['state'][i].tolist()))
+    return state_vector
+
+
+def parse_oem(source) -> Dict[str, object]:
+    """
+    Streams the header, metadata, comments and state vectors out of an OEM XML document in one pass.
+
+    Each stateVector element is cleared once it has been read so the full document tree is never held in memory.
+
+    Parameters:
+        source: A file-like object (or path) containing the XML data.
+
+    Returns:
+        dict: 'header' and 'metadata' map child tags to their text, 'comment' is the list of
+              COMMENT lines in the data section, and 'data' is a list of dictionaries with keys
+              'EPOCH', 'X', 'Y', 'Z', 'X_DOT', 'Y_DOT', and 'Z_DOT'.
+    """
+    header = {}
+    metadata = {}
+    comment = []
     iss_data = []
-    for state_vector in data['ndm']['oem']['body']['segment']['data']['stateVector']:
+    for _, elem in etree.iterparse(source, events=('end',), tag=('header', 'metadata', 'COMMENT', 'stateVector')):
+        if elem.tag == 'header':
+            header = {child.tag: child.text for child in elem if child.tag != 'COMMENT'}
+            continue
+        if elem.tag == 'metadata':
+            metadata = {child.tag: child.text for child in elem if child.tag != 'COMMENT'}
+            continue
+        if elem.tag == 'COMMENT':
+            if elem.getparent().tag == 'data':
+                comment.append(elem.text)
+            continue
+
         iss_data.append({
-            'EPOCH' : state_vector['EPOCH'],
-        
-            'X' : float(state_vector['X']['#text']),
+            'EPOCH' : elem.findtext('EPOCH'),
 
-            'Y' : float(state_vector['Y']['#text']),
-            'Z' : float(state_vector['Z']['#text']),
+            'X' : float(elem.findtext('X')),
+            'Y' : float(elem.findtext('Y')),
+            'Z' : float(elem.findtext('Z')),
 
-            'X_DOT' : float(state_vector['X_DOT']['#text']),
-            'Y_DOT' : float(state_vector['Y_DOT']['#text']), 
-            'Z_DOT' : float(state_vector['Z_DOT']['#text'])
+            'X_DOT' : float(elem.findtext('X_DOT')),
+            'Y_DOT' : float(elem.findtext('Y_DOT')),
+            'Z_DOT' : float(elem.findtext('Z_DOT'))
+        })
 
-	})
-	
-    return iss_data 	
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    return {'header': header, 'metadata': metadata, 'comment': comment, 'data': iss_data}
 
   
 def calculate_lat(epochs: str) -> float:
@@ -67,17 +369,12 @@ def calculate_lat(epochs: str) -> float:
         ValueError: If the epoch is not found in the data.
     """    
     try:
-        data = get_data(url)
-    
-        for state_vector in data:
-            if state_vector['EPOCH'] == epochs:
-               x = float(state_vector['X'])
-               y = float(state_vector['Y'])
-               z = float(state_vector['Z'])
-
-               latitude = math.degrees(math.atan2(z, math.sqrt(x**2 + y**2)))
-               return float(latitude)
-        raise ValueError(f"Epoch '{epochs}' not found in the data.")
+        state = get_state(url)
+        i = find_epoch(state, epochs)
+        if i is None:
+            raise ValueError(f"Epoch '{epochs}' not found in the data.")
+
+        return float(state['lat'][i])
     
     except (ValueError, KeyError) as e:
         # Handle exceptions and return None
@@ -98,23 +395,13 @@ def calculate_alt(epochs: str) -> float:
     Raises:
         ValueError: If the epoch is not found in the data.
     """
-
-    MEAN_EARTH_RADIUS = 6371.0088  
-
     try:
-        data = get_data(url)
-
-        for state_vector in data:
-            if state_vector['EPOCH'] == epochs:
-               x = float(state_vector['X'])
-               y = float(state_vector['Y'])
-               z = float(state_vector['Z'])
-  
-               altitude = math.sqrt(x**2 + y**2 + z**2) - MEAN_EARTH_RADIUS 
-
-               return float(altitude)
+        state = get_state(url)
+        i = find_epoch(state, epochs)
+        if i is None:
+            raise ValueError(f"Epoch '{epochs}' not found in the data.")
 
-        raise ValueError(f"Epoch '{epochs}' not found in the data.")
+        return float(state['alt'][i])
     
     except (ValueError, KeyError) as e:
         # Handle exceptions and return None
@@ -136,33 +423,74 @@ def calculate_long(epochs: str) -> float:
         ValueError: If the epoch is not found in the data.
     """
     try:
-        data = get_data(url)
-
-        parsed_timestamp = datetime.strptime(epochs, '%Y-%jT%H:%M:%S.%fZ') 
-        hrs = int(parsed_timestamp.strftime('%H'))
-        mins = int(parsed_timestamp.strftime('%M'))
+        state = get_state(url)
+        i = find_epoch(state, epochs)
+        if i is None:
+            raise ValueError(f"Epoch '{epochs}' not found in the data.")
 
-        for state_vector in data:
-            if state_vector['EPOCH'] == epochs:
-               x = float(state_vector['X'])
-               y = float(state_vector['Y'])
-               z = float(state_vector['Z'])
-
-               longitude = math.degrees(math.atan2(y, x)) - ((hrs-12)+(mins/60))*(360/24) 
-
-               if longitude > 180:
-                  longitude = -180 + (longitude - 180)
-               elif longitude < -180:
-                  longitude = 180 + (longitude + 180)
-
-               return float(longitude) 
-        raise ValueError(f"Epoch '{epochs}' not found in the data.")
+        return float(state['long'][i])
     
     except (ValueError, KeyError) as e:
         # Handle exceptions and return None
         print(f"Error: {e}")
         return None
 
+@functools.lru_cache(maxsize=4096)
+def reverse_geocode(lat: float, long: float):
+    """
+    Reverse geocodes a coordinate pair, remembering the answer for repeated coordinates.
+
+    Parameters:
+        lat (float): Latitude coordinate, already rounded to GEOCODE_PRECISION.
+        long (float): Longitude coordinate, already rounded to GEOCODE_PRECISION.
+
+    Returns:
+        The geopy Location for the coordinates, or None if there is no address there.
+    """
+    return geocoder.reverse((f"{lat},{long}"), zoom=15, language='en')
+
+
+def ojson(obj, etag: Union[str, None] = None, weak: bool = False) -> Response:
+    """
+    Serializes an object to a JSON response with orjson, which also accepts NumPy arrays and scalars.
+
+    Parameters:
+        obj: The object to serialize.
+        etag (str, optional): ETag identifying the data behind the response. When given, the
+                              ETag and Cache-Control headers are set so clients can revalidate.
+        weak (bool): Send the ETag as weak, for bodies that can vary while the data behind them does not.
+
+    Returns:
+        Response: An application/json response containing the serialized object.
+    """
+    # Sorted keys match the output jsonify produced before the switch to orjson
+    body = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    response = Response(body, mimetype='application/json')
+    if etag is not None:
+        response.set_etag(etag, weak=weak)
+        response.headers['Cache-Control'] = f'public, max-age={CLIENT_MAX_AGE}'
+    return response
+
+
+def not_modified(etag: str, weak: bool = False) -> Union[Response, None]:
+    """
+    Checks the request's If-None-Match header against an ETag, using weak comparison.
+
+    Parameters:
+        etag (str): ETag identifying the data behind the response.
+        weak (bool): Whether the ETag is sent as weak, as passed to ojson().
+
+    Returns:
+        Union[Response, None]: An empty 304 response if the client already has this data, otherwise None.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = f'public, max-age={CLIENT_MAX_AGE}'
+    return response
+
+
 def calculate_geoposition(lat: float, long: float) -> Union[str, None]:
     """
     Calculate the geoposition (address) based on the latitude and longitude.
@@ -178,8 +506,7 @@ def calculate_geoposition(lat: float, long: float) -> Union[str, None]:
         Exception: If there is an error retrieving the ISS location.
     """     
     try:    
-       geocoder = Nominatim(user_agent='iss_tracker')
-       geoloc = geocoder.reverse((f"{lat},{long}"), zoom=15, language='en')
+       geoloc = reverse_geocode(round(lat, GEOCODE_PRECISION), round(long, GEOCODE_PRECISION))
     
        if geoloc is None:
           return "Location currently unavailable"
@@ -190,6 +517,76 @@ def calculate_geoposition(lat: float, long: float) -> Union[str, None]:
         logging.error(f"Error in calculate_geoposition: {e}")
         raise Exception("Error retrieving ISS location")
 
+
+def refresh_now() -> Dict[str, object]:
+    """
+    Recomputes the /now result for the epoch nearest the current time and stores it in _NOW.
+
+    Returns:
+        dict: The new _NOW entry, with the response body under 'result', its 'etag', and the
+              time.time() it was computed under 'ts'.
+    """
+    global _NOW
+
+    version = get_document(url)['version']
+    state = get_state(url)
+    current_time = np.datetime64(datetime.utcnow(), 'ms')
+
+    i = int(np.abs(state['epochs_dt64'] - current_time).argmin())
+    closest_epoch = state_vector_at(state, i)
+
+    closest_speed = str(state['speed'][i])
+    lat = state['lat'][i]
+    alt = state['alt'][i]
+    longitude = state['long'][i]
+    geoloc = calculate_geoposition(lat,longitude)
+
+    closest_epoch['Speed'] = closest_speed
+    closest_epoch['Latitude'] = lat
+    closest_epoch['Altitude'] = alt
+    closest_epoch['Longitude'] = longitude
+    closest_epoch['Geoposition'] = geoloc
+    closest_epoch['Updated'] = datetime.utcnow().strftime('%Y-%jT%H:%M:%S.%fZ')
+
+    # Every refresh changes 'Updated' (and possibly 'Geoposition'), so its time is part of the ETag
+    ts = time.time()
+    _NOW = {'result': closest_epoch, 'etag': f"{version}-{i}-{int(ts * 1000)}", 'ts': ts}
+    return _NOW
+
+
+def _refresh_now_locked() -> None:
+    """
+    Runs refresh_now() and releases _refresh_lock, which the caller must already hold.
+    """
+    try:
+        refresh_now()
+    except Exception as e:
+        logging.error(f"Error refreshing /now: {e}")
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh_now_loop() -> None:
+    """
+    Keeps _NOW fresh every NOW_REFRESH_INTERVAL seconds so /now never waits on NASA or Nominatim.
+    """
+    while True:
+        time.sleep(NOW_REFRESH_INTERVAL)
+        if _refresh_lock.acquire(blocking=False):
+            _refresh_now_locked()
+
+
+def start_now_refresher() -> None:
+    """
+    Starts the background thread running _refresh_now_loop(), once per process.
+    """
+    global _now_thread
+
+    with _now_lock:
+        if _now_thread is None:
+            _now_thread = threading.Thread(target=_refresh_now_loop, daemon=True)
+            _now_thread.start()
+
     
 @app.route('/epochs', methods = ['GET'])
 def epochs() -> Union[List[Dict[str, float]], Tuple[Dict[str, str], int]]:
@@ -201,7 +598,11 @@ def epochs() -> Union[List[Dict[str, float]], Tuple[Dict[str, str], int]]:
               Each dictionary represents a state vector with keys 'EPOCH', 'X', 'Y', 'Z', 'X_DOT', 'Y_DOT', and 'Z_DOT'.
         tuple: A tuple containing an error message dictionary and HTTP status code if an error occurs.
     """    
-    data = get_data(url)
+    document = get_document(url)
+    cached = not_modified(document['version'])
+    if cached is not None:
+        return cached
+    data = document['data']
     
     try:
         limit = request.args.get('limit', default = None, type = int) 
@@ -209,7 +610,7 @@ def epochs() -> Union[List[Dict[str, float]], Tuple[Dict[str, str], int]]:
         
         if limit is not None:
            data = data[offset:offset + limit]
-        return data
+        return ojson(data, document['version'])
        
     except Exception as e:
         logging.error(f"Error in get_epochs: {e}")
@@ -228,10 +629,16 @@ def state_vectors(epoch: str) -> Union[Dict[str, float], Tuple[Dict[str, str], i
         dict: A dictionary containing the state vector data for the specified epoch.
         tuple: A tuple containing an error message dictionary and HTTP status code if the specified epoch is not found.
     """
-    data = get_data(url)
-    for i in range(len(data)):
-        if (data[i]['EPOCH'] == epoch):
-           return data[i]
+    version = get_document(url)['version']
+    state = get_state(url)
+    i = find_epoch(state, epoch)
+    if i is None:
+        return {"error": f"Epoch '{epoch}' not found in the data."}, 404
+
+    cached = not_modified(version)
+    if cached is not None:
+        return cached
+    return ojson(state_vector_at(state, i), version)
 
 
 @app.route('/epochs/<epoch>/speed', methods = ['GET'])
@@ -247,17 +654,16 @@ def instantaneous_speed(epoch: str) -> Union[str, Tuple[Dict[str, str], int]]:
         tuple: A tuple containing an error message dictionary and HTTP status code if the specified epoch is not found or an error occurs during calculation.
      """
     try:
-        data = get_data(url)
-    
-        for i in range(len(data)):
-            if (data[i]['EPOCH'] == epoch):
-                x_dot = float(data[i]['X_DOT'])
-                y_dot = float(data[i]['Y_DOT'])
-                z_dot = float(data[i]['Z_DOT'])
- 
-                speed =  str(math.sqrt((x_dot**2) + (y_dot**2) + (z_dot**2)))
-
-                return jsonify(speed)
+        version = get_document(url)['version']
+        state = get_state(url)
+        i = find_epoch(state, epoch)
+        if i is None:
+            return {"error": f"Epoch '{epoch}' not found in the data."}, 404
+
+        cached = not_modified(version)
+        if cached is not None:
+            return cached
+        return ojson(str(state['speed'][i]), version)
     except Exception as e:
         logging.error(f"Error in get_epochs: {e}")
         return {"error": str(e)}, 500    
@@ -268,34 +674,31 @@ def nearest_epoch() -> Union[Dict[str, Union[str, float]], Tuple[Dict[str, str],
     """
     Finds the nearest epoch to the current time and calculates its speed, latitude, longitude, altitude, and geoposition.
 
+    The result is kept up to date by a background thread, so requests return the latest copy
+    without waiting on NASA or Nominatim, even when that copy is stale. Only the very first
+    request computes it inline. 'Updated' records when that copy was computed.
+
     Returns:
        dict: A dictionary containing information about the nearest epoch, including its epoch time, calculated speed, latitude, altitude, longitude, and geopositon.
        tuple: A tuple containing an error message dictionary and HTTP status code if an error occurs during calculation.
     """
     try:
-        data = get_data(url)
-        current_time = datetime.utcnow()
-               
-        closest_epoch = min(data, key = lambda vector: abs(datetime.strptime(vector["EPOCH"], "%Y-%jT%H:%M:%S.%fZ") - current_time))
-      
-        closest_speed = str(math.sqrt((closest_epoch['X_DOT']**2) + (closest_epoch['Y_DOT']**2) + (closest_epoch['Z_DOT']**2)))
-        lat = calculate_lat(closest_epoch['EPOCH'])
-        alt = calculate_alt(closest_epoch['EPOCH'])
-        longitude = calculate_long(closest_epoch['EPOCH'])
-        geoloc = calculate_geoposition(lat,longitude)
- 
-        if longitude > 180:
-           longitude = -180 + (longitude - 180) 
-        elif longitude < -180:
-             longitude = 180 + (longitude + 180)
-     
-        closest_epoch['Speed'] = closest_speed
-        closest_epoch['Latitude'] = lat
-        closest_epoch['Altitude'] = alt   
-        closest_epoch['Longitude'] = longitude
-        closest_epoch['Geoposition'] = geoloc
-        
-        return jsonify(closest_epoch)
+        now = _NOW
+        if not now:
+            # Nothing to serve yet; concurrent first requests wait for a single refresh
+            with _refresh_lock:
+                now = _NOW or refresh_now()
+        elif time.time() - now['ts'] > 2 * NOW_REFRESH_INTERVAL:
+            # The background thread has fallen behind; serve the stale copy while one thread refreshes it
+            if _refresh_lock.acquire(blocking=False):
+                threading.Thread(target=_refresh_now_locked, daemon=True).start()
+        start_now_refresher()
+
+        cached = not_modified(now['etag'])
+        if cached is not None:
+            return cached
+
+        return ojson(now['result'], now['etag'])
 
     except Exception as e:
         logging.error(f"Error in get_epochs: {e}")
@@ -313,37 +716,41 @@ def location(epoch: str) -> dict:
     Returns:
         dict: A dictionary containing the location information.
               The dictionary includes the following keys:
-              - 'EPOCH': The provided epoch.
+              - 'EPOCH': The matching epoch from the data.
               - 'Latitude': The latitude of the International Space Station (ISS).
               - 'Longitude': The longitude of the ISS.
               - 'Altitude': The altitude of the ISS.
               - 'Geoposition': The geoposition (address) of the ISS.
+        tuple: A tuple containing an error message dictionary and HTTP status code if the specified epoch is not found.
 
     Raises:
         Exception: If there is an error retrieving location information.
     """
     try:
-        data = get_data(url)
-        iss_data_location = {}
+        version = get_document(url)['version']
+        state = get_state(url)
+        i = find_epoch(state, epoch)
+        if i is None:
+            return {"error": f"Epoch '{epoch}' not found in the data."}, 404
 
-        for state_vector in data:
-            if state_vector['EPOCH'] == epoch:
-                x = float(state_vector['X'])
-                y = float(state_vector['Y'])
-                z = float(state_vector['Z'])
-        
-        lat = calculate_lat(epoch)
-        long = calculate_long(epoch)
-        alt = calculate_alt(epoch)
+        # Geoposition comes from Nominatim and can change while the NASA data does not
+        cached = not_modified(version, weak=True)
+        if cached is not None:
+            return cached
+
+        iss_data_location = {}
+        lat = state['lat'][i]
+        long = state['long'][i]
+        alt = state['alt'][i]
         geoLoc = calculate_geoposition(lat, long)
 
-        iss_data_location['EPOCH'] = epoch
+        iss_data_location['EPOCH'] = str(state['epochs'][i])
         iss_data_location['Latitude'] = lat
         iss_data_location['Longitude'] = long
         iss_data_location['Altitude'] = alt
         iss_data_location['Geoposition'] = geoLoc
 
-        return jsonify(iss_data_location)
+        return ojson(iss_data_location, version, weak=True)
     
     except Exception as e:
         logging.error(f"Error in location route: {e}")
@@ -360,14 +767,15 @@ def return_comment() -> Union[dict, str]:
                           If an error occurs, returns an error message as a string.
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = xmltodict.parse(response.content)
+        document = get_document(url)
+        cached = not_modified(document['version'])
+        if cached is not None:
+            return cached
         
         # Extract comment from the ISS data
-        iss_data = {'COMMENT': data['ndm']['oem']['body']['segment']['data']['COMMENT']}
+        iss_data = {'COMMENT': document['comment']}
         
-        return jsonify(iss_data['COMMENT'])
+        return ojson(iss_data['COMMENT'], document['version'])
     
     except Exception as e:
         logging.error(f"Error in return_comment route: {e}")
@@ -384,17 +792,19 @@ def return_header() -> Union[dict, str]:
                           If an error occurs, returns an error message as a string.
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = xmltodict.parse(response.content)
+        document = get_document(url)
+        cached = not_modified(document['version'])
+        if cached is not None:
+            return cached
+        header = document['header']
         
         # Extract header information from the ISS data
         iss_data = {
-            'CREATION_DATE': data['ndm']['oem']['header']['CREATION_DATE'],
-            'ORIGINATOR': data['ndm']['oem']['header']['ORIGINATOR']
+            'CREATION_DATE': header['CREATION_DATE'],
+            'ORIGINATOR': header['ORIGINATOR']
         }
         
-        return jsonify(iss_data)
+        return ojson(iss_data, document['version'])
     
     except Exception as e:
         logging.error(f"Error in return_header route: {e}")
@@ -411,22 +821,24 @@ def return_metadata() -> Union[dict, str]:
                           If an error occurs, returns an error message as a string.
     """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = xmltodict.parse(response.content)
+        document = get_document(url)
+        cached = not_modified(document['version'])
+        if cached is not None:
+            return cached
+        metadata = document['metadata']
         
         # Extract metadata information from the ISS data
         iss_data = {
-            'OBJECT_NAME': data['ndm']['oem']['body']['segment']['metadata']['OBJECT_NAME'],
-            'OBJECT_ID': data['ndm']['oem']['body']['segment']['metadata']['OBJECT_ID'],
-            'CENTER_NAME': data['ndm']['oem']['body']['segment']['metadata']['CENTER_NAME'],
-            'REF_FRAME': data['ndm']['oem']['body']['segment']['metadata']['REF_FRAME'],
-            'TIME_SYSTEM': data['ndm']['oem']['body']['segment']['metadata']['TIME_SYSTEM'],
-            'START_TIME': data['ndm']['oem']['body']['segment']['metadata']['START_TIME'],
-            'STOP_TIME': data['ndm']['oem']['body']['segment']['metadata']['STOP_TIME']
+            'OBJECT_NAME': metadata['OBJECT_NAME'],
+            'OBJECT_ID': metadata['OBJECT_ID'],
+            'CENTER_NAME': metadata['CENTER_NAME'],
+            'REF_FRAME': metadata['REF_FRAME'],
+            'TIME_SYSTEM': metadata['TIME_SYSTEM'],
+            'START_TIME': metadata['START_TIME'],
+            'STOP_TIME': metadata['STOP_TIME']
         }
         
-        return jsonify(iss_data)
+        return ojson(iss_data, document['version'])
     
     except Exception as e:
         logging.error(f"Error in return_metadata route: {e}")
@@ -434,4 +846,5 @@ def return_metadata() -> Union[dict, str]:
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    # Development server only; use wsgi.py with gunicorn to serve the API
+    app.run(host='0.0.0.0')
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""
+WSGI entrypoint for serving the ISS Tracker API with a production server, e.g.
+
+    gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+"""
+from iss_tracker import app